@@ -1,5 +1,7 @@
-import csv
-import re
+import os
+import mmap
+import stat
+from contextlib import nullcontext
 import argparse
 
 
@@ -17,7 +19,7 @@ This script then splits the ID based on a specified delimiter, and writes the re
 Extract Headers: The script reads a multi-FASTA file and extracts the headers.
 Parse Headers: It extracts the sequence ID from the headers, which is located between the first pair of | delimiters.
 Split Headers: The sequence ID is split into multiple parts based on the / delimiter.
-Write to TSV: The original headers and the split parts are written to an output TSV file. The script ensures the output file includes column names specified by the user.
+Write to TSV: The original headers and the split parts are streamed to an output TSV file as they are parsed. The script ensures the output file includes column names specified by the user.
 
 The script can be run from the command line and accepts the following arguments:
 
@@ -27,40 +29,87 @@ The script can be run from the command line and accepts the following arguments:
 
 '''
 
-def extract_and_split_headers(fasta_file):
-    original_headers = []
-    split_headers = []
-
-    with open(fasta_file, 'r') as file:
-        for line in file:
-            if line.startswith('>'):
-                # Extract the original header line
-                original_header = line[1:].strip()  # Remove the '>' and strip newline
-                original_headers.append(original_header)
-                
-                # Use regex to extract the sequence ID within the first pair of | delimiters
-                match = re.search(r'\|([^|]+)\|', original_header)
-                if match:
-                    sequence_id = match.group(1)
-                    split_headers.append(sequence_id.split('/'))
-    
-    return original_headers, split_headers
-
-def write_to_tsv(original_headers, split_headers, output_file, column_names):
-    max_columns = max(len(header) for header in split_headers)
-
-    # Extend column_names if they are fewer than the maximum number of columns
-    if len(column_names) < max_columns:
-        column_names += [f'Part{i}' for i in range(len(column_names) + 1, max_columns + 1)]
-
-    # Add the column name for the original header
-    column_names = ['OriginalHeader'] + column_names[:max_columns]
-    
-    with open(output_file, 'w', newline='') as tsvfile:
-        writer = csv.writer(tsvfile, delimiter='\t')
-        writer.writerow(column_names)  # Write the column names
-        for original_header, split_header in zip(original_headers, split_headers):
-            writer.writerow([original_header] + split_header + [''] * (max_columns - len(split_header)))  # Pad with empty strings if necessary
+def find_pipe_id(header):
+    # Same result as re.search(r'\|([^|]+)\|', header): empty pipe pairs are skipped, so a||b|c gives b
+    p1 = header.find(b'|')
+    while p1 >= 0:
+        p2 = header.find(b'|', p1 + 1)
+        if p2 < 0:
+            return None
+        if p2 > p1 + 1:
+            return header[p1 + 1:p2]
+        p1 = p2
+    return None
+
+def iter_header_ids(data):
+    # Yield (original header, sequence ID) for every header with an ID between the first pair of | delimiters.
+    # Headers are reached with find(b'\n>'), so sequence lines are skipped without being visited one by one.
+    size = len(data)
+    pos = 0 if data[:1] == b'>' else data.find(b'\n>') + 1
+    while pos < size and data[pos:pos + 1] == b'>':
+        end = data.find(b'\n', pos)
+        if end < 0:
+            end = size
+        original_header = data[pos + 1:end].strip()  # Remove the '>' and strip newline
+        sequence_id = find_pipe_id(original_header)
+        if sequence_id is not None:
+            yield original_header, sequence_id
+        next_header = data.find(b'\n>', end)
+        pos = next_header + 1 if next_header >= 0 else size
+
+def count_max_columns(data):
+    # The header row needs the column count before the first data row is written, so this pre-pass stays,
+    # but it only touches header bytes and counts the '/' separated fields without building the split lists
+    max_columns = 0
+    for _, sequence_id in iter_header_ids(data):
+        num_columns = sequence_id.count(b'/') + 1
+        if num_columns > max_columns:
+            max_columns = num_columns
+    return max_columns
+
+def parse_and_write(fasta_file, output_file, column_names):
+    with open(fasta_file, 'rb') as file:
+        st = os.fstat(file.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            # Pipes and FIFOs report size 0 and cannot be mapped, so read them whole
+            mapping = nullcontext(file.read())
+        elif st.st_size:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # mmap cannot map an empty file
+            mapping = nullcontext(b'')
+        with mapping as data:
+            # First pass sizes the columns, second pass streams the rows straight to the TSV
+            max_columns = count_max_columns(data)
+
+            # Extend column_names if they are fewer than the maximum number of columns
+            if len(column_names) < max_columns:
+                column_names += [f'Part{i}' for i in range(len(column_names) + 1, max_columns + 1)]
+
+            # Add the column name for the original header
+            column_names = ['OriginalHeader'] + column_names[:max_columns]
+
+            # Headers never contain tabs, so rows are joined directly instead of going through csv quoting
+            sep = b'\t'
+            with open(output_file, 'wb', buffering=1 << 20) as tsvfile:
+                tsvfile.write(sep.join(name.encode() for name in column_names) + b'\n')  # Write the column names
+                buf = bytearray()
+                num_rows = 0
+                # Padding for every possible number of missing cells, built once instead of per row
+                paddings = [sep * i for i in range(max_columns + 1)]
+                for original_header, sequence_id in iter_header_ids(data):
+                    # Extend the batch in place rather than concatenating a new bytes object per row
+                    buf += original_header
+                    buf += sep
+                    buf += sequence_id.replace(b'/', sep)  # Split on '/' without building a list of parts
+                    buf += paddings[max_columns - 1 - sequence_id.count(b'/')]  # Pad with empty cells if necessary
+                    buf += b'\n'
+                    num_rows += 1
+                    if num_rows == 4096:
+                        tsvfile.write(buf)
+                        buf.clear()
+                        num_rows = 0
+                tsvfile.write(buf)
 
 def main():
     parser = argparse.ArgumentParser(description='Extract and split headers from a multi-FASTA file and write to a TSV file.')
@@ -70,8 +119,7 @@ def main():
 
     args = parser.parse_args()
 
-    original_headers, split_headers = extract_and_split_headers(args.input)
-    write_to_tsv(original_headers, split_headers, args.output, args.column_names)
+    parse_and_write(args.input, args.output, args.column_names)
 
     print(f"Data has been written to {args.output}")
 
@@ -1,35 +1,73 @@
 import os
+import re
+import sys
+import mmap
 import argparse
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
-def remove_duplicates(input_path, output_dir):
+# Both modes deduplicate on the text between the first non-empty pair of | delimiters,
+# falling back to the whole header line when there is no such pair (seqkit's behaviour when the regex does not match)
+ID_REGEXP = r"\|([^|]+)\|"
+
+def remove_duplicates(input_path, output_dir, jobs=None, in_process=False):
     """
     Remove duplicate sequences from FASTA files based on the strain name portion of the sequence headers.
 
     Args:
         input_path (str): Path to the input FASTA file or directory containing FASTA files.
         output_dir (str): Path to the output directory where the non-redundant FASTA files will be saved.
+        jobs (int): Number of seqkit processes to run at once (defaults to the number of CPUs).
+        in_process (bool): Deduplicate in Python instead of calling seqkit.
+
+    Exits with status 1 if two FASTA files in the directory share a basename and would map to the same output file.
     """
+    rmdup = run_inprocess_rmdup if in_process else run_seqkit_rmdup
     if os.path.isfile(input_path):
         # If input_path is a file, process the single FASTA file
         base_filename = os.path.splitext(os.path.basename(input_path))[0]
         output_file = os.path.join(output_dir, f"{base_filename}.rmdup.fasta")
-        run_seqkit_rmdup(input_path, output_file)
+        rmdup(input_path, output_file)
     elif os.path.isdir(input_path):
         # If input_path is a directory, process all FASTA files in the directory
-        for root, dirs, files in os.walk(input_path):
-            for file in files:
-                if file.endswith(".fasta"):
-                    input_file = os.path.join(root, file)
-                    base_filename = os.path.splitext(file)[0]
-                    output_file = os.path.join(output_dir, f"{base_filename}.rmdup.fasta")
-                    run_seqkit_rmdup(input_file, output_file)
+        pairs = []
+        seen_outputs = {}
+        for input_file in iter_fasta_files(input_path):
+            base_filename = os.path.splitext(os.path.basename(input_file))[0]
+            output_file = os.path.join(output_dir, f"{base_filename}.rmdup.fasta")
+            # Outputs are named by basename only, so two inputs with the same name would be written concurrently
+            if output_file in seen_outputs:
+                print(f"Error: {seen_outputs[output_file]} and {input_file} would both be written to {output_file}.")
+                sys.exit(1)
+            seen_outputs[output_file] = input_file
+            pairs.append((input_file, output_file))
+
+        # seqkit runs in its own process, so threads are enough to keep several going at once
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+            list(executor.map(lambda pair: rmdup(*pair), pairs))
     else:
         print(f"Error: {input_path} is not a valid file or directory.")
 
+def iter_fasta_files(path):
+    """
+    Recursively yield the paths of .fasta files under a directory.
+
+    Uses os.scandir so file types come from the cached DirEntry instead of extra stat calls.
+    Like os.walk, symlinked files are included but symlinked directories are not descended into.
+
+    Args:
+        path (str): Directory to search.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_fasta_files(entry.path)
+            elif entry.name.endswith(".fasta") and entry.is_file():
+                yield entry.path
+
 def run_seqkit_rmdup(input_file, output_file):
     """
-    Run the seqkit rmdup command with the provided regular expression.
+    Run seqkit rmdup keyed on the ID captured by ID_REGEXP.
 
     Args:
         input_file (str): Path to the input FASTA file.
@@ -37,19 +75,67 @@ def run_seqkit_rmdup(input_file, output_file):
     """
     seqkit_cmd = [
         "seqkit", "rmdup",
-        "-n", "--id-regexp", r"\|([^|]+)\|",
+        "--id-regexp", ID_REGEXP,
         input_file,
     ]
     with open(output_file, "w") as out_file:
         subprocess.run(seqkit_cmd, stdout=out_file, check=True)
 
+def run_inprocess_rmdup(input_file, output_file):
+    """
+    Remove duplicates without seqkit, keeping the first record for each ID captured by ID_REGEXP.
+
+    Args:
+        input_file (str): Path to the input FASTA file.
+        output_file (str): Path to the output non-redundant FASTA file.
+    """
+    import xxhash
+
+    id_regexp = re.compile(ID_REGEXP.encode())
+    seen = set()
+    with open(output_file, "wb") as out_file:
+        if os.path.getsize(input_file) == 0:
+            return
+        with open(input_file, "rb") as in_file, mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            if mm[:1] == b">":
+                pos = 0
+            else:
+                first_record = mm.find(b"\n>")
+                pos = first_record + 1 if first_record >= 0 else size
+            buf = bytearray()
+            while pos < size:
+                next_record = mm.find(b"\n>", pos)
+                end = next_record + 1 if next_record >= 0 else size
+                header_end = mm.find(b"\n", pos, end)
+                if header_end < 0:
+                    header_end = end
+                header = mm[pos:header_end]
+
+                # Hash the ID captured by ID_REGEXP, falling back to the whole header like seqkit does
+                match = id_regexp.search(header)
+                seq_id = match.group(1) if match else header[1:].rstrip()
+                h = xxhash.xxh3_64_intdigest(seq_id)
+                if h not in seen:
+                    seen.add(h)
+                    buf += mm[pos:end]
+                    if buf[-1:] != b"\n":
+                        buf += b"\n"
+                    if len(buf) >= 1 << 20:
+                        out_file.write(buf)
+                        buf.clear()
+                pos = end
+            out_file.write(buf)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Remove duplicate sequences from FASTA files.")
     parser.add_argument("-i", "--input", required=True, help="Path to the input FASTA file or directory containing FASTA files.")
     parser.add_argument("-o", "--output", required=True, help="Path to the output directory for non-redundant FASTA files.")
+    parser.add_argument("--in-process", action="store_true", help="Deduplicate in Python (requires xxhash) instead of calling seqkit.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of FASTA files to process in parallel (default: number of CPUs).")
     args = parser.parse_args()
 
     # Create the output directory if it doesn't exist
     os.makedirs(args.output, exist_ok=True)
 
-    remove_duplicates(args.input, args.output)
+    remove_duplicates(args.input, args.output, args.jobs, args.in_process)
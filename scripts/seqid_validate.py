@@ -4,52 +4,87 @@ This script takes a fasta file in a strict header format "seqID_segment#"
 """
 
 import argparse
-from Bio import SeqIO
+import mmap
+from contextlib import nullcontext
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import os
+import stat
 
 def parse_fasta(fasta_file):
-    seq_ids = set()
-    for record in SeqIO.parse(fasta_file, "fasta"):
-        seqid_segment = record.id
-        seqid = seqid_segment.split('_')[0]  # Extract the seqid before the segment number
-        seq_ids.add(seqid)
-    return seq_ids
-
-def parse_metadata(metadata_file):
-    metadata_df = pd.read_csv(metadata_file, sep="\t")
-    metadata_seq_ids = set(metadata_df['seqid'])
+    # Only the headers are needed, so jump from header to header with find(b'\n>') instead of visiting every sequence line
+    seq_ids = []
+    with open(fasta_file, 'rb') as handle:
+        st = os.fstat(handle.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            # Pipes and FIFOs report size 0 and cannot be mapped, so read them whole
+            mapping = nullcontext(handle.read())
+        elif st.st_size:
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # mmap cannot map an empty file
+            mapping = nullcontext(b'')
+        with mapping as data:
+            size = len(data)
+            pos = 0 if data[:1] == b'>' else data.find(b'\n>') + 1
+            while pos < size and data[pos:pos + 1] == b'>':
+                end_hdr = data.find(b'\n', pos)
+                if end_hdr < 0:
+                    end_hdr = size
+                fields = data[pos + 1:end_hdr].split(None, 1)  # record.id is the header up to the first whitespace
+                seqid_segment = fields[0] if fields else b''
+                seqid = seqid_segment.split(b'_', 1)[0]  # Extract the seqid before the segment number
+                seq_ids.append(seqid.decode())
+                next_hdr = data.find(b'\n>', end_hdr)
+                pos = next_hdr + 1 if next_hdr >= 0 else size
+    return pc.unique(pa.array(seq_ids, type=pa.string()))
+
+def parse_metadata(metadata_file, seqid_only=False):
+    if seqid_only:
+        # Only the seqid column is needed when no filtered metadata is written out
+        metadata_df = pd.read_csv(metadata_file, sep="\t", usecols=['seqid'], dtype={'seqid': 'string'})
+    else:
+        metadata_df = pd.read_csv(metadata_file, sep="\t", dtype={'seqid': 'string'})
+    metadata_seq_ids = pc.unique(pa.array(metadata_df['seqid'].dropna().to_numpy(), type=pa.string()))
     return metadata_seq_ids, metadata_df
 
-def write_files(directory, fasta_ids, metadata_ids, metadata_df):
+def _dump(path, ids):
+    # Write a one-column seqid TSV, joining 64k rows at a time to keep the number of writes down
+    ids = ids.take(pc.array_sort_indices(ids)).to_pylist()
+    with open(path, 'w', buffering=1 << 20) as f:
+        f.write('seqid\n')
+        for i in range(0, len(ids), 65536):
+            f.write('\n'.join(ids[i:i + 65536]))
+            f.write('\n')
+
+def write_files(directory, fasta_ids, metadata_ids, intersect_ids, fasta_only_ids, metadata_only_ids):
     os.makedirs(directory, exist_ok=True)
 
     # Write all seqids in the FASTA file
-    fasta_ids_df = pd.DataFrame(list(fasta_ids), columns=['seqid'])
-    fasta_ids_df.to_csv(os.path.join(directory, 'fasta_ids.tsv'), sep="\t", index=False)
+    _dump(os.path.join(directory, 'fasta_ids.tsv'), fasta_ids)
 
     # Write all seqids in the metadata file
-    metadata_ids_df = pd.DataFrame(list(metadata_ids), columns=['seqid'])
-    metadata_ids_df.to_csv(os.path.join(directory, 'metadata_ids.tsv'), sep="\t", index=False)
+    _dump(os.path.join(directory, 'metadata_ids.tsv'), metadata_ids)
 
     # Write seqids present in both files
-    intersect_ids = fasta_ids & metadata_ids
-    intersect_ids_df = pd.DataFrame(list(intersect_ids), columns=['seqid'])
-    intersect_ids_df.to_csv(os.path.join(directory, 'intersect.tsv'), sep="\t", index=False)
+    _dump(os.path.join(directory, 'intersect.tsv'), intersect_ids)
 
     # Write seqids only in the FASTA file
-    fasta_only_ids = fasta_ids - metadata_ids
-    fasta_only_ids_df = pd.DataFrame(list(fasta_only_ids), columns=['seqid'])
-    fasta_only_ids_df.to_csv(os.path.join(directory, 'fasta_only.tsv'), sep="\t", index=False)
+    _dump(os.path.join(directory, 'fasta_only.tsv'), fasta_only_ids)
 
     # Write seqids only in the metadata file
-    metadata_only_ids = metadata_ids - fasta_ids
-    metadata_only_ids_df = pd.DataFrame(list(metadata_only_ids), columns=['seqid'])
-    metadata_only_ids_df.to_csv(os.path.join(directory, 'metadata_only.tsv'), sep="\t", index=False)
+    _dump(os.path.join(directory, 'metadata_only.tsv'), metadata_only_ids)
 
 def compare_ids(fasta_file, metadata_file, output_metadata_file=None, output_dir=None):
     fasta_ids = parse_fasta(fasta_file)
-    metadata_ids, metadata_df = parse_metadata(metadata_file)
+    metadata_ids, metadata_df = parse_metadata(metadata_file, seqid_only=output_metadata_file is None)
+
+    # Compute the comparisons once with Arrow's hashing kernels and reuse them for the counts and the output files
+    in_metadata = pc.is_in(fasta_ids, value_set=metadata_ids)
+    common_ids = fasta_ids.filter(in_metadata)
+    fasta_only_ids = fasta_ids.filter(pc.invert(in_metadata))
+    metadata_only_ids = metadata_ids.filter(pc.invert(pc.is_in(metadata_ids, value_set=fasta_ids)))
 
     # 1. Number of unique IDs in the fasta file
     num_unique_fasta_ids = len(fasta_ids)
@@ -60,17 +95,14 @@ def compare_ids(fasta_file, metadata_file, output_metadata_file=None, output_dir
     print(f"2. Number of unique IDs in the metadata file: {num_unique_metadata_ids}")
 
     # 3. Number of unique seqids present in both files
-    common_ids = fasta_ids & metadata_ids
     num_common_ids = len(common_ids)
     print(f"3. Number of unique IDs present in both files: {num_common_ids}")
 
     # 4. Number of unique seqids in the FASTA file but not in the metadata file
-    fasta_only_ids = fasta_ids - metadata_ids
     num_fasta_only_ids = len(fasta_only_ids)
     print(f"4. Number of unique IDs in the FASTA file but not in the metadata file: {num_fasta_only_ids}")
 
     # 5. Number of unique seqids in the metadata file but not in the FASTA file
-    metadata_only_ids = metadata_ids - fasta_ids
     num_metadata_only_ids = len(metadata_only_ids)
     print(f"5. Number of unique IDs in the metadata file but not in the FASTA file: {num_metadata_only_ids}")
 
@@ -82,13 +114,15 @@ def compare_ids(fasta_file, metadata_file, output_metadata_file=None, output_dir
 
     # 8. Write out a new metadata.tsv file with only the rows containing seqIDs present in the FASTA file
     if output_metadata_file:
-        filtered_metadata_df = metadata_df[metadata_df['seqid'].isin(fasta_ids)]
+        # Hand isin an ndarray so pandas goes straight to its hashtable lookup
+        fasta_ids_arr = fasta_ids.to_numpy(zero_copy_only=False)
+        filtered_metadata_df = metadata_df[metadata_df['seqid'].isin(fasta_ids_arr)]
         filtered_metadata_df.to_csv(output_metadata_file, sep="\t", index=False)
         print(f"\nFiltered metadata written to: {output_metadata_file}")
 
     # 9. Write out the five specified files
     if output_dir:
-        write_files(output_dir, fasta_ids, metadata_ids, metadata_df)
+        write_files(output_dir, fasta_ids, metadata_ids, common_ids, fasta_only_ids, metadata_only_ids)
         print(f"\nFiles written to: {output_dir}")
         print("\nFiles created:")
         print("  fasta_ids.tsv: Contains all seqids present in the FASTA file.")
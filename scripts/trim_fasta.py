@@ -4,27 +4,90 @@ A simple script for trimming single or multi-fasta files according to nt or aa p
     - output_file (str): Path to the output trimmed FASTA file.
     - start_position (int): Start position for trimming.
     - stop_position (int): Stop position for trimming.
+    - line_width (int): Sequence line width in the output, 60 by default (--no-wrap writes each sequence on one line).
+    - use_index (bool): Read only the requested region of each sequence through a samtools faidx index (--use-index).
+
+With --use-index, a .fai index next to the input and pysam are required, and I/O scales with #records x region length
+instead of the total bases. The index only stores sequence names, so headers are written as the name without the
+description. Without the flag (or when the region is not a plain 0 <= start <= stop range) the whole file is streamed
+and full headers are kept.
 """
 
 import argparse
 import os
-from Bio import SeqIO
 
-def trim_fasta(input_file, output_file, start_position, stop_position):
+def iter_fasta_records(handle, keep=None):
+    """
+    Yield (header, sequence) byte pairs from a FASTA handle opened in binary mode.
+    Line-wrapped sequences are joined, and if keep is given only the first keep bytes of each sequence are buffered.
+    """
+    header = None
+    seq = bytearray()
+    for line in handle:
+        if line[:1] == b'>':
+            if header is not None:
+                yield header, seq
+            header = line[1:].rstrip()
+            seq = bytearray()
+        elif header is not None and (keep is None or len(seq) < keep):
+            seq += line.rstrip()
+    if header is not None:
+        yield header, seq
 
+def iter_indexed_records(input_file, start_position, stop_position):
+    """
+    Yield (name, trimmed sequence) byte pairs using the .fai index, or None if the index cannot be used.
+    """
+    # Negative or reversed regions are left to the streaming path, where they follow Python slice semantics
+    if not 0 <= start_position <= stop_position or not os.path.isfile(input_file + '.fai'):
+        return None
     try:
-        with open(input_file, 'r') as handle:
-            records = SeqIO.parse(handle, 'fasta')
-            trimmed_records = []
+        import pysam
+    except ImportError:
+        return None
+
+    def records():
+        with pysam.FastaFile(input_file) as fasta:
+            for ref in fasta.references:
+                yield ref.encode(), fasta.fetch(ref, start_position, stop_position).encode()
+    return records()
+
+def write_fasta_record(out_handle, header, seq, line_width=60):
+    """
+    Write one FASTA record, wrapping the sequence at line_width characters (no wrapping if line_width is 0).
+    """
+    out_handle.write(b'>')
+    out_handle.write(header)
+    out_handle.write(b'\n')
+    if not line_width:
+        out_handle.write(seq)
+        out_handle.write(b'\n')
+        return
+    mv = memoryview(seq)
+    out_handle.writelines([mv[i:i + line_width].tobytes() + b'\n' for i in range(0, len(mv), line_width)])
 
-            for record in records:
-                trimmed_record = record[start_position:stop_position] # absolute starting position
-                trimmed_records.append(trimmed_record)
+def trim_fasta(input_file, output_file, start_position, stop_position, line_width=60, use_index=False):
 
-            with open(output_file, 'w') as out_handle:
-                SeqIO.write(trimmed_records, out_handle, 'fasta')
+    # Bases past the stop position are never written, so they are not kept in memory (only valid for non-negative positions)
+    keep = stop_position if start_position >= 0 and stop_position >= 0 else None
+
+    try:
+        num_records_trimmed = 0
+        indexed_records = iter_indexed_records(input_file, start_position, stop_position) if use_index else None
+        if use_index and indexed_records is None:
+            print("Index not used (needs input_file.fai, pysam and 0 <= start <= stop); streaming the whole file instead.")
+        with open(output_file, 'wb', buffering=1 << 20) as out_handle:
+            if indexed_records is not None:
+                for header, trimmed_seq in indexed_records:
+                    write_fasta_record(out_handle, header, trimmed_seq, line_width)
+                    num_records_trimmed += 1
+            else:
+                with open(input_file, 'rb', buffering=1 << 20) as handle:
+                    for header, seq in iter_fasta_records(handle, keep):
+                        trimmed_seq = seq[start_position:stop_position] # absolute starting position
+                        write_fasta_record(out_handle, header, trimmed_seq, line_width)
+                        num_records_trimmed += 1
 
-        num_records_trimmed = len(trimmed_records)
         print(f"Trimming completed successfully!")
         print(f"Input file: {input_file}")
         print(f"Output file: {output_file}")
@@ -43,10 +106,12 @@ if __name__ == "__main__":
     parser.add_argument("-o", "--output", dest="output_file", required=True, help="Path to the output trimmed FASTA file.")
     parser.add_argument("-s", "--start", dest="start_position", type=int, required=True, help="Start position for trimming.")
     parser.add_argument("-e", "--end", dest="stop_position", type=int, required=True, help="Stop position for trimming.")
+    parser.add_argument("--no-wrap", action="store_true", help="Write each sequence on a single line instead of wrapping at 60 characters.")
+    parser.add_argument("--use-index", action="store_true", help="Fetch only the trimmed region via the input's .fai index (requires pysam). Headers keep the sequence name only.")
 
     args = parser.parse_args()
 
     if not os.path.isfile(args.input_file):
         print(f"Error: Input file '{args.input_file}' not found.")
     else:
-        trim_fasta(args.input_file, args.output_file, args.start_position, args.stop_position)
\ No newline at end of file
+        trim_fasta(args.input_file, args.output_file, args.start_position, args.stop_position, 0 if args.no_wrap else 60, args.use_index)
\ No newline at end of file